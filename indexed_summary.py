@@ -0,0 +1,76 @@
+import bisect
+import mmap
+import msgpack
+
+
+def write_indexed_summary(data: dict, path: str):
+	# every value is packed separately, the index maps each key to its [offset, length] in the blob
+	index = dict()
+	offset = 0
+	with open(f'{path}/data.blob', 'wb') as f:
+		for key, value in data.items():
+			packed = msgpack.packb(value)
+			f.write(packed)
+			index[key] = [offset, len(packed)]
+			offset += len(packed)
+	with open(f'{path}/data.index.msgpack', 'wb') as f:
+		f.write(msgpack.packb(index))
+
+
+class IndexedSummary:
+	"""Read-only access to single entries of an indexed summary, without unpacking the others.
+
+	>>> with IndexedSummary('summary/data/loot_table') as loot_tables:
+	...     loot_tables['chests/simple_dungeon']
+	"""
+
+	def __init__(self, path: str):
+		with open(f'{path}/data.index.msgpack', 'rb') as f:
+			self.index: dict[str, list[int]] = msgpack.unpackb(f.read())
+		self.file = open(f'{path}/data.blob', 'rb')
+		# mmap does not support empty files
+		self.blob = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.index else None
+
+	def __getitem__(self, key: str):
+		offset, length = self.index[key]
+		return msgpack.unpackb(self.blob[offset:offset + length])
+
+	def __contains__(self, key: str):
+		return key in self.index
+
+	def __len__(self):
+		return len(self.index)
+
+	def __iter__(self):
+		return iter(self.index)
+
+	def get(self, key: str, default=None):
+		if key not in self.index:
+			return default
+		return self[key]
+
+	def keys(self):
+		return self.index.keys()
+
+	def close(self):
+		if self.blob is not None:
+			self.blob.close()
+		self.file.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *args):
+		self.close()
+
+
+def lookup_registry_history(history: dict, registry: str, entry: str | None = None):
+	"""Returns the first and last version a registry, or an entry in it, was seen in, or None."""
+	table = history['registries'] if entry is None else history['entries'].get(registry)
+	key = registry if entry is None else entry
+	if table is None:
+		return None
+	i = bisect.bisect_left(table['keys'], key)
+	if i == len(table['keys']) or table['keys'][i] != key:
+		return None
+	return history['versions'][table['first'][i]], history['versions'][table['last'][i]]
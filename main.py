@@ -29,7 +29,9 @@ import json
 import os
 import os.path
 import glob
+import fnmatch
 import msgpack
+import ijson
 import gzip
 import shutil
 import dotenv
@@ -40,9 +42,19 @@ import image_packer.packer
 import nbtlib
 import multiprocessing
 import traceback
+import hashlib
+import sys
+import functools
+import http.server
+import urllib.parse
+from indexed_summary import write_indexed_summary
 
 EXPORTS = ('assets', 'assets-json', 'assets-tiny', 'data', 'data-json', 'summary', 'registries', 'atlas', 'diff')
 
+SHARED_REPOSITORY = 'exports.git'
+
+EMPTY_TREE = '4b825dc642cb6eb9a060e54bf8d69288fbee4904'
+
 APRIL_FOOLS = ('15w14a', '3D Shareware v1.34', '20w14infinite', '22w13oneblockatatime', '23w13a_or_b', '24w14potato', '25w14craftmine', '26w14a')
 
 @click.command()
@@ -54,13 +66,19 @@ APRIL_FOOLS = ('15w14a', '3D Shareware v1.34', '20w14infinite', '22w13oneblockat
 @click.option('--commit', is_flag=True, help='Whether to commit the exports')
 @click.option('--export', '-e', multiple=True, default=tuple(), type=click.Choice([*EXPORTS, 'all'], case_sensitive=True))
 @click.option('--fixtags', is_flag=True, help='Whether to fix all the tags')
-@click.option('--push', is_flag=True, help='Whether to push to the remote after each commit')
+@click.option('--push', is_flag=True, help='Whether to push to the remote after the commits')
+@click.option('--push-interval', type=int, default=0, help='The number of versions after which to push, by default only at the end')
+@click.option('--push-each', is_flag=True, help='Whether to push each export after every commit instead')
 @click.option('--force', is_flag=True, help='Whether to force push')
 @click.option('--branch', help='The export branch prefix to use')
-def main(version: str | None, file: str | None, reset: bool, fetch: bool, undo: str | None, commit: bool, export: tuple[str], fixtags: bool, push: bool, force: bool, branch: str | None):
+@click.option('--shared', is_flag=True, help='Whether to back all exports with one shared object store')
+@click.option('--rebuild', multiple=True, default=tuple(), type=click.Choice([*EXPORTS, 'all'], case_sensitive=True), help='Exports to rebuild even when their inputs did not change')
+def main(version: str | None, file: str | None, reset: bool, fetch: bool, undo: str | None, commit: bool, export: tuple[str], fixtags: bool, push: bool, force: bool, branch: str | None, shared: bool, push_interval: int, push_each: bool, rebuild: tuple[str]):
 	dotenv.load_dotenv()
 	if 'all' in export:
 		export = EXPORTS
+	if 'all' in rebuild:
+		rebuild = EXPORTS
 
 	versions = retry(fetch_versions, version, file)
 
@@ -68,7 +86,7 @@ def main(version: str | None, file: str | None, reset: bool, fetch: bool, undo:
 	process_versions = expand_version_range(version, versions)
 	n = len(process_versions)
 	start_date = versions[process_versions[0]]['releaseTime'] if process_versions else None
-	init_exports(start_date, reset, fetch, undo, export, branch)
+	init_exports(start_date, reset, fetch, undo, export, branch, shared)
 
 	try:
 		os.remove('versions.json')
@@ -78,30 +96,175 @@ def main(version: str | None, file: str | None, reset: bool, fetch: bool, undo:
 	if process_versions:
 		click.echo(f'📃 Processing versions: {", ".join(process_versions)}')
 		t0 = time.time()
-		for i, v in enumerate(process_versions):
-			click.echo(f'🚧 Processing {v}...')
-			t1 = time.time()
-			try:
-				process(v, versions, export)
-			except ValueError as e:
-				click.echo(f'💥 Failed to process {v}: {e}')
-				traceback.print_exc()
-				return
-
-			if commit:
-				create_commit(v, versions[v]['releaseTime'], push, force, export, branch)
-			t2 = time.time()
-			if n == 1:
-				click.echo(f'✅ Done {v} ({format_time(t2 - t1)})')
-			else:
-				remaining = t2 - t0 + int(t2 - t1) * (n - i - 1)
-				click.echo(f'✅ Done {v} ({i+1} / {n}) {format_time(t2 - t1)} ({format_time(t2 - t0)} / {format_time(remaining)})')
+		batch_push = commit and push and not push_each
+		unpushed = []
+		# push whatever was committed, also when processing fails partway
+		root = os.getcwd()
+		try:
+			for i, v in enumerate(process_versions):
+				t1 = time.time()
+				fingerprint = None
+				stale_exports = export
+				if commit:
+					fingerprint = get_fingerprint(v, versions, export)
+					stale_exports = tuple(e for e in export if e in rebuild or read_fingerprint(e) != fingerprint)
+					if not stale_exports:
+						click.echo(f'⏭️ Skipping {v}, the exports are up to date')
+						unpushed.append(v)
+						if batch_push and push_interval and len(unpushed) >= push_interval:
+							push_exports(export, branch, force, unpushed)
+							unpushed = []
+						continue
+				click.echo(f'🚧 Processing {v}...')
+				try:
+					process(v, versions, export)
+				except ValueError as e:
+					click.echo(f'💥 Failed to process {v}: {e}')
+					traceback.print_exc()
+					return
+
+				if commit:
+					create_commit(v, versions[v]['releaseTime'], push and push_each, force, stale_exports, branch, fingerprint)
+					unpushed.append(v)
+					if batch_push and push_interval and len(unpushed) >= push_interval:
+						push_exports(export, branch, force, unpushed)
+						unpushed = []
+				t2 = time.time()
+				if n == 1:
+					click.echo(f'✅ Done {v} ({format_time(t2 - t1)})')
+				else:
+					remaining = t2 - t0 + int(t2 - t1) * (n - i - 1)
+					click.echo(f'✅ Done {v} ({i+1} / {n}) {format_time(t2 - t1)} ({format_time(t2 - t0)} / {format_time(remaining)})')
+		finally:
+			os.chdir(root)
+			if batch_push and unpushed:
+				push_exports(export, branch, force, unpushed)
 
 	if fixtags:
 		fix_tags(export, branch)
 
 	if (not version or fixtags) and push:
-		create_commit(None, None, push, force, export, branch)
+		push_exports(export, branch, force)
+
+
+@click.command()
+@click.option('--version', '-v', multiple=True, help='The versions to serve, by default the checked out summary')
+@click.option('--host', default='127.0.0.1', help='The host to listen on')
+@click.option('--port', '-p', type=int, default=8080, help='The port to listen on')
+@click.option('--cache-size', type=int, default=4096, help='The number of decoded entries to keep in memory')
+def serve(version: tuple[str], host: str, port: int, cache_size: int):
+	summaries = dict()
+	for ref in [f'{v}-summary' for v in version] or [None]:
+		v = read_summary_file(ref, 'version.txt').decode('utf-8').strip()
+		summaries[v] = load_summaries(ref)
+		click.echo(f'📦 Loaded {len(summaries[v])} summaries for {v}')
+	default_version = next(iter(summaries))
+
+	@functools.lru_cache(maxsize=cache_size)
+	def get_entry(version: str, summary: str, key: str):
+		entries = summaries[version][summary]
+		if type(entries) == dict:
+			return entries[key]
+		index, blob = entries
+		offset, length = index[key]
+		return msgpack.unpackb(blob[offset:offset + length])
+
+	def get_keys(version: str, summary: str):
+		entries = summaries[version][summary]
+		return list(entries.keys() if type(entries) == dict else entries[0].keys())
+
+	class Handler(http.server.BaseHTTPRequestHandler):
+		def do_GET(self):
+			url = urllib.parse.urlsplit(self.path)
+			path = urllib.parse.unquote(url.path).strip('/')
+			version = urllib.parse.parse_qs(url.query).get('version', [default_version])[0]
+			if path == 'versions':
+				return self.respond(200, list(summaries.keys()))
+			if version not in summaries:
+				return self.respond(404, { 'error': f'Version {version} is not loaded' })
+			if path in summaries[version]:
+				return self.respond(200, get_keys(version, path))
+			# registry and entry ids can contain slashes, so match the longest summary
+			summary = max((s for s in summaries[version] if path.startswith(f'{s}/')), key=len, default=None)
+			if summary is None:
+				return self.respond(404, { 'error': f'Unknown summary {path}' })
+			try:
+				return self.respond(200, get_entry(version, summary, path.removeprefix(f'{summary}/')))
+			except KeyError:
+				return self.respond(404, { 'error': f'Unknown entry {path}' })
+
+		def respond(self, status: int, data):
+			body = json.dumps(data).encode('utf-8')
+			self.send_response(status)
+			self.send_header('Content-Type', 'application/json')
+			self.send_header('Content-Length', str(len(body)))
+			self.end_headers()
+			self.wfile.write(body)
+
+		def log_message(self, format, *args):
+			pass
+
+	server = http.server.ThreadingHTTPServer((host, port), Handler)
+	click.echo(f'🌐 Serving {", ".join(summaries.keys())} on http://{host}:{port}')
+	try:
+		server.serve_forever()
+	except KeyboardInterrupt:
+		server.server_close()
+
+
+def read_summary_file(ref: str | None, path: str):
+	if ref is None:
+		with open(f'summary/{path}', 'rb') as f:
+			return f.read()
+	return subprocess.run(['git', 'show', f'{ref}:{path}'], cwd='summary', capture_output=True, check=True).stdout
+
+
+def read_summary_version(ref: str | None):
+	try:
+		return read_summary_file(ref, 'version.txt').decode('utf-8').strip()
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def find_previous_summary(version: str):
+	# walk back through the summary history until a commit of a different version
+	try:
+		commits = subprocess.run(['git', 'log', '--format=%H'], cwd='summary', capture_output=True, check=True).stdout.decode('utf-8').split()
+	except (OSError, subprocess.CalledProcessError):
+		return None, None
+	for commit in commits:
+		commit_version = read_summary_version(commit)
+		if commit_version is None:
+			break
+		if commit_version != version:
+			return commit, commit_version
+	return None, None
+
+
+def list_summary_files(ref: str | None):
+	if ref is None:
+		return set(f.replace('\\', '/', -1).removeprefix('summary/') for f in glob.glob('summary/**/*', recursive=True))
+	return set(subprocess.run(['git', 'ls-tree', '-r', '--name-only', ref], cwd='summary', capture_output=True, check=True).stdout.decode('utf-8').split('\n'))
+
+
+def load_summaries(ref: str | None):
+	# keep the packed entries and their index when available, older summaries are decoded in full
+	files = list_summary_files(ref)
+	summaries = dict()
+	for file in sorted(files):
+		if not file.endswith('/data.msgpack'):
+			continue
+		key = file.removesuffix('/data.msgpack')
+		if key == 'commands':
+			summaries[key] = msgpack.unpackb(read_summary_file(ref, file)).get('children', {})
+		elif f'{key}/data.index.msgpack' in files:
+			index = msgpack.unpackb(read_summary_file(ref, f'{key}/data.index.msgpack'))
+			summaries[key] = (index, read_summary_file(ref, f'{key}/data.blob'))
+		else:
+			data = msgpack.unpackb(read_summary_file(ref, file))
+			if type(data) == dict:
+				summaries[key] = data
+	return summaries
 
 
 def format_time(seconds: float | int):
@@ -237,11 +400,23 @@ def process(version: str, versions: dict[str], exports: tuple[str]):
 			f.write(side_content)
 
 	# === extract client jar ===
-	shutil.rmtree('assets/assets', ignore_errors=True)
-	shutil.rmtree('assets-json/assets', ignore_errors=True)
+	# asset trees still in sync with the previous asset index only lose their jar files,
+	# the resources in them are updated with the delta in the download step
+	resources_index = load_resources_index()
+	resources_exports = get_resources_exports(exports)
+	synced_exports = [e for e in resources_exports if is_resources_synced(e, resources_index)]
+	if resources_index:
+		resources_index['exports'] = {}
+		save_resources_index(resources_index)
+	for export in ['assets', 'assets-json']:
+		if export in synced_exports:
+			remove_jar_files(f'{export}/assets', resources_index['objects'])
+		else:
+			shutil.rmtree(f'{export}/assets', ignore_errors=True)
 	shutil.rmtree('assets-tiny/assets', ignore_errors=True)
 	shutil.rmtree('data/data', ignore_errors=True)
 	shutil.rmtree('data-json/data', ignore_errors=True)
+	jar_assets = set()
 	with zipfile.ZipFile('client.jar', 'r') as jar:
 		for file in jar.namelist():
 			if file.endswith('.mcassetsroot'):
@@ -251,6 +426,8 @@ def process(version: str, versions: dict[str], exports: tuple[str]):
 			for part in ['assets', 'data']:
 				if file.startswith(f'{part}/'):
 					jar.extract(file, part)
+					if part == 'assets':
+						jar_assets.add(file.removeprefix('assets/'))
 					if f'{part}-json' in exports and file.endswith('.json'):
 						jar.extract(file, f'{part}-json')
 					if part == 'assets' and 'assets-tiny' in exports:
@@ -432,22 +609,45 @@ def process(version: str, versions: dict[str], exports: tuple[str]):
 		assets_bytes = retry(fetch, f'assets-{assets_hash}', assets_url)
 		assets = json.loads(assets_bytes.decode('utf-8'))
 
-		click.echo(f'      Downloading {len(assets["objects"])} resources')
-		shutil.rmtree('resources', ignore_errors=True)
+		# only download the objects that changed since the previous asset index
+		objects = { key: obj['hash'] for key, obj in assets['objects'].items() }
+		if resources_index is None:
+			shutil.rmtree('resources', ignore_errors=True)
+			previous_objects = dict()
+		else:
+			previous_objects = resources_index['objects']
+		added = [key for key in objects if key not in previous_objects]
+		changed = [key for key in objects if key in previous_objects and previous_objects[key] != objects[key]]
+		removed = [key for key in previous_objects if key not in objects]
+		# until the download finishes, resources/ no longer matches any index
+		remove_file('resources/.index.json')
+		click.echo(f'      Downloading {len(added) + len(changed)} resources ({len(added)} added, {len(changed)} changed, {len(removed)} removed)')
 		os.makedirs('resources', exist_ok=True)
+		for key in removed:
+			remove_file(f'resources/{key}')
 		with multiprocessing.Pool(20) as pool:
-			pool.map(download_resource, assets['objects'].items())
+			pool.map(download_resource, [(key, assets['objects'][key]) for key in [*added, *changed]])
 
 		for export, pattern in [('assets', '*.*'), ('assets-json', '*.json')]:
-			if export in exports or (export == 'assets' and ('diff' in exports or 'summary' in exports)):
-				for path in glob.glob(f'resources/**/{pattern}', recursive=True):
-					if path.endswith('hash.txt') or path.endswith('pack.mcmeta'):
+			if export in resources_exports:
+				if export in synced_exports:
+					for key in removed:
+						if key not in jar_assets:
+							remove_file(f'{export}/assets/{key}')
+					# resources overwrite files from the jar, so those need to be copied again
+					keys = sorted(set([*added, *changed, *jar_assets.intersection(objects)]))
+				else:
+					keys = objects.keys()
+				for key in keys:
+					if not is_exported_resource(key, pattern):
 						continue
-					target = f'{export}/assets{path.removeprefix("resources")}'
+					target = f'{export}/assets/{key}'
 					os.makedirs(os.path.normpath(os.path.join(target, '..')), exist_ok=True)
-					shutil.copyfile(path, target)
+					shutil.copyfile(f'resources/{key}', target)
 				shutil.copyfile('resources/pack.mcmeta', f'{export}/pack.mcmeta')
 
+		save_resources_index({ 'version': version, 'objects': objects, 'exports': { e: version for e in resources_exports } })
+
 		if 'summary' in exports or 'diff' in exports:
 			with open(f'resources/minecraft/sounds.json', 'r') as f:
 				sounds: dict = json.load(f)
@@ -542,26 +742,16 @@ def process(version: str, versions: dict[str], exports: tuple[str]):
 		block_definitions = dict()
 		item_components = dict()
 		if os.path.isfile('generated/reports/blocks.json'):
-			with open('generated/reports/blocks.json', 'r') as f:
-				for key, data in json.load(f).items():
-					properties = data.get('properties')
-					if properties:
-						default = next(s.get('properties') for s in data['states'] if s.get('default'))
-						blocks[key.removeprefix('minecraft:')] = (properties, default)
-					else:
-						blocks[key.removeprefix('minecraft:')] = ({}, {})
-					definition = data.get('definition')
-					if definition:
-						block_definitions[key.removeprefix('minecraft:')] = definition
+			blocks, block_definitions = read_blocks_report('generated/reports/blocks.json')
 		item_components_path = 'generated/reports/minecraft/components/item'
 		if os.path.isdir(item_components_path):
 			for path in glob.glob(f'{item_components_path}/**/*.json', recursive=True):
 				item_id = path.replace('\\', '/', -1).removeprefix(f'{item_components_path}/').removesuffix('.json')
-				with open(path, 'r') as f:
-					item_components[item_id] = json.load(f).get('components')
+				with open(path, 'rb') as f:
+					item_components[item_id] = next(ijson.items(f, 'components', use_float=True), None)
 		elif os.path.isfile('generated/reports/items.json'):
-			with open('generated/reports/items.json', 'r') as f:
-				for key, data in json.load(f).items():
+			with open('generated/reports/items.json', 'rb') as f:
+				for key, data in ijson.kvitems(f, '', use_float=True):
 					components = data.get('components')
 					if components:
 						item_components[key.removeprefix('minecraft:')] = components
@@ -576,7 +766,7 @@ def process(version: str, versions: dict[str], exports: tuple[str]):
 	click.echo('   🚚 Exporting')
 
 	# === export summary ===
-	def create_summary(data, path, clear=True, bin=True):
+	def create_summary(data, path, clear=True, bin=True, indexed=False):
 		if clear:
 			shutil.rmtree(path, ignore_errors=True)
 			os.makedirs(path, exist_ok=True)
@@ -593,19 +783,52 @@ def process(version: str, versions: dict[str], exports: tuple[str]):
 				f.write(gzip.compress(json.dumps(data).encode('utf-8'), mtime=0))
 			with open(f'{path}/data.msgpack.gz', 'wb') as f:
 				f.write(gzip.compress(msgpack.packb(data), mtime=0))
+			if indexed and type(data) == dict:
+				write_indexed_summary(data, path)
 
 	if 'summary' in exports:
-		create_summary(dict(sorted(registries.items())), 'summary/registries')
-		create_summary(dict(sorted(blocks.items())), 'summary/blocks')
-		create_summary(dict(sorted(block_definitions.items())), 'summary/block_definitions')
-		create_summary(dict(sorted(item_components.items())), 'summary/item_components')
-		create_summary(dict(sorted(sounds.items())), 'summary/sounds')
-		create_summary(commands, 'summary/commands')
-		create_summary(version_metas, 'summary/versions')
+		# when re-processing a version, diff against the commit before it instead
+		previous_ref = None
+		previous_version = read_summary_version(None)
+		if previous_version == version:
+			previous_ref, previous_version = find_previous_summary(version)
+		previous_summaries = set(f.removesuffix('/data.msgpack') for f in list_summary_files(previous_ref) if f.endswith('/data.msgpack')) if previous_version else set()
+		created_summaries = set()
+		deltas = dict()
+
+		# diff against the previous summary before it gets overwritten
+		def create_summary_with_delta(data, key: str):
+			if previous_version:
+				delta = create_summary_delta(load_summary(key, previous_ref), data)
+				if delta:
+					deltas[key] = delta
+			created_summaries.add(key)
+			create_summary(data, f'summary/{key}', indexed=True)
+
+		create_summary_with_delta(dict(sorted(registries.items())), 'registries')
+		create_summary_with_delta(dict(sorted(blocks.items())), 'blocks')
+		create_summary_with_delta(dict(sorted(block_definitions.items())), 'block_definitions')
+		create_summary_with_delta(dict(sorted(item_components.items())), 'item_components')
+		create_summary_with_delta(dict(sorted(sounds.items())), 'sounds')
+		create_summary_with_delta(commands, 'commands')
+		create_summary_with_delta(version_metas, 'versions')
 
 		for key in contents:
 			part = 'assets' if key in asset_registries.values() else 'data'
-			create_summary(dict(sorted(contents[key].items())), f'summary/{part}/{key}', bin=True)
+			create_summary_with_delta(dict(sorted(contents[key].items())), f'{part}/{key}')
+
+		removed_summaries = sorted(previous_summaries - created_summaries - {'history'})
+		for key in removed_summaries:
+			shutil.rmtree(f'summary/{key}', ignore_errors=True)
+
+		if previous_version:
+			with open('summary/delta.msgpack', 'wb') as f:
+				f.write(msgpack.packb({ 'from': previous_version, 'to': version, 'summaries': deltas, 'removed': removed_summaries }))
+		else:
+			remove_file('summary/delta.msgpack')
+
+		history = update_registry_history(load_summary('history'), version, versions, registries)
+		create_summary(history, 'summary/history')
 
 		with open(f'summary/version.txt', 'w') as f:
 			f.write(version + '\n')
@@ -724,15 +947,133 @@ def process(version: str, versions: dict[str], exports: tuple[str]):
 			shutil.copyfile(f'{export}/pack.mcmeta', f'{export}-json/pack.mcmeta')
 
 
-def init_exports(start_date: str | None, reset: bool, fetch: bool, undo: str | None, exports: tuple[str], branch: str | None):
+def read_blocks_report(path: str):
+	# stream the report, only keeping the properties of the default state instead of all states
+	properties = dict()
+	defaults = dict()
+	block_definitions = dict()
+	builder, depth, field = None, 0, None
+	state_properties, state_default = None, False
+	with open(path, 'rb') as f:
+		for prefix, event, value in ijson.parse(f, use_float=True):
+			if builder is not None:
+				builder.event(event, value)
+				depth += 1 if event in ('start_map', 'start_array') else -1 if event in ('end_map', 'end_array') else 0
+				if depth == 0:
+					if field == 'properties':
+						properties[key] = builder.value
+					elif field == 'definition' and builder.value:
+						block_definitions[key] = builder.value
+					elif field == 'states.item.properties':
+						state_properties = builder.value
+					builder = None
+				continue
+			block, _, field = prefix.partition('.')
+			key = block.removeprefix('minecraft:')
+			if prefix == '' and event == 'map_key':
+				properties[value.removeprefix('minecraft:')] = None
+			elif field in ('properties', 'definition', 'states.item.properties') and event == 'start_map':
+				builder = ijson.ObjectBuilder()
+				builder.event(event, value)
+				depth = 1
+			elif field == 'states.item' and event == 'start_map':
+				state_properties, state_default = None, False
+			elif field == 'states.item.default' and event == 'boolean':
+				state_default = value
+			elif field == 'states.item' and event == 'end_map' and state_default:
+				defaults[key] = state_properties
+	blocks = { key: (props, defaults.get(key)) if props else ({}, {}) for key, props in properties.items() }
+	return blocks, block_definitions
+
+
+def update_registry_history(history: dict | None, version: str, versions: dict[str], registries: dict[str, list[str]]):
+	# versions are stored chronologically and referenced by index, keys are kept sorted for binary search
+	if history is None:
+		history = { 'versions': [], 'registries': { 'keys': [], 'first': [], 'last': [] }, 'entries': {} }
+	old_versions = history['versions']
+	new_versions = sorted(set([*old_versions, version]), key=lambda v: -versions[v]['index'] if v in versions else 0)
+	order = { v: i for i, v in enumerate(new_versions) }
+	current = order[version]
+
+	def update(table: dict | None, keys: list[str]):
+		seen = { k: [order[old_versions[f]], order[old_versions[l]]] for k, f, l in zip(table['keys'], table['first'], table['last']) } if table else {}
+		for key in keys:
+			if key in seen:
+				seen[key] = [min(seen[key][0], current), max(seen[key][1], current)]
+			else:
+				seen[key] = [current, current]
+		sorted_keys = sorted(seen.keys())
+		return {
+			'keys': sorted_keys,
+			'first': [seen[k][0] for k in sorted_keys],
+			'last': [seen[k][1] for k in sorted_keys],
+		}
+
+	history['registries'] = update(history['registries'], registries.keys())
+	for key in history['registries']['keys']:
+		history['entries'][key] = update(history['entries'].get(key), registries.get(key, []))
+	history['entries'] = dict(sorted(history['entries'].items()))
+	history['versions'] = new_versions
+	return history
+
+
+def load_summary(key: str, ref: str | None = None):
+	try:
+		return msgpack.unpackb(read_summary_file(ref, f'{key}/data.msgpack'))
+	except (OSError, subprocess.CalledProcessError):
+		return None
+
+
+def create_summary_delta(old, new):
+	# compare the msgpack representation, which turns tuples into lists
+	new = msgpack.unpackb(msgpack.packb(new))
+	if old == new:
+		return None
+	if type(old) != dict or type(new) != dict:
+		return { 'patch': create_json_patch(old, new) }
+	return {
+		'added': { k: v for k, v in new.items() if k not in old },
+		'removed': [k for k in old if k not in new],
+		'changed': { k: create_json_patch(old[k], v) for k, v in new.items() if k in old and old[k] != v },
+	}
+
+
+def create_json_patch(old, new, path: str = ''):
+	if old == new:
+		return []
+	if type(old) == dict and type(new) == dict:
+		patch = []
+		for key, value in old.items():
+			pointer = f'{path}/{str(key).replace("~", "~0").replace("/", "~1")}'
+			if key not in new:
+				patch.append({ 'op': 'remove', 'path': pointer })
+			else:
+				patch.extend(create_json_patch(value, new[key], pointer))
+		for key, value in new.items():
+			if key not in old:
+				pointer = f'{path}/{str(key).replace("~", "~0").replace("/", "~1")}'
+				patch.append({ 'op': 'add', 'path': pointer, 'value': value })
+		return patch
+	if type(old) == list and type(new) == list and len(old) == len(new):
+		return [op for i, (a, b) in enumerate(zip(old, new)) for op in create_json_patch(a, b, f'{path}/{i}')]
+	return [{ 'op': 'replace', 'path': path, 'value': new }]
+
+
+def init_exports(start_date: str | None, reset: bool, fetch: bool, undo: str | None, exports: tuple[str], branch: str | None, shared: bool = False):
 	for export in exports:
 		export_branch = f'{branch}-{export}' if branch else export
 		if reset:
 			shutil.rmtree(export, ignore_errors=True)
-		os.makedirs(export, exist_ok=True)
-		os.chdir(export)
-		subprocess.run(['git', 'init', '-q'])
-		subprocess.run(['git', 'checkout', '-q', '-b', export_branch], capture_output=True)
+		if reset or fetch or undo:
+			invalidate_resources_export(export)
+		if shared:
+			init_shared_worktree(export, export_branch, reset)
+			os.chdir(export)
+		else:
+			os.makedirs(export, exist_ok=True)
+			os.chdir(export)
+			subprocess.run(['git', 'init', '-q'])
+			subprocess.run(['git', 'checkout', '-q', '-b', export_branch], capture_output=True)
 		subprocess.run(['git', 'config', 'user.name', 'actions-user'])
 		subprocess.run(['git', 'config', 'user.email', 'actions@github.com'])
 		if os.getenv('github-repository'):
@@ -741,6 +1082,7 @@ def init_exports(start_date: str | None, reset: bool, fetch: bool, undo: str | N
 			subprocess.run(['git', 'remote', 'set-url' if 'origin' in remotes else 'add', 'origin', remote])
 		if fetch:
 			subprocess.run(['git', 'fetch', '-q', '--tags', 'origin', export_branch])
+			subprocess.run(['git', 'fetch', '-q', 'origin', f'+refs/notes/fingerprint-{export}:refs/notes/fingerprint-{export}'], capture_output=True)
 			subprocess.run(['git', 'reset', '-q', '--hard', f'origin/{export_branch}'])
 		elif reset:
 			assert start_date, 'Cannot reset without a version'
@@ -755,7 +1097,70 @@ def init_exports(start_date: str | None, reset: bool, fetch: bool, undo: str | N
 		click.echo(f'🎉 Initialized {export} branch')
 
 
-def create_commit(version: str | None, date: str | None, push: bool, force: bool, exports: tuple[str], branch: str | None):
+def init_shared_worktree(export: str, export_branch: str, reset: bool):
+	# all exports are worktrees of one bare repository, so identical blobs are only stored once
+	repo = ['git', '-C', SHARED_REPOSITORY]
+	if not os.path.isdir(SHARED_REPOSITORY):
+		subprocess.run(['git', 'init', '-q', '--bare', SHARED_REPOSITORY])
+		subprocess.run([*repo, 'config', 'user.name', 'actions-user'])
+		subprocess.run([*repo, 'config', 'user.email', 'actions@github.com'])
+	if os.path.isdir(f'{export}/.git'):
+		# move the history of a standalone export repository into the shared store
+		fetched = subprocess.run([*repo, 'fetch', '-q', os.path.abspath(export), f'+refs/heads/{export_branch}:refs/heads/{export_branch}', f'+refs/tags/*-{export}:refs/tags/*-{export}'], capture_output=True)
+		has_branch = subprocess.run([*repo, 'rev-parse', '-q', '--verify', f'refs/heads/{export_branch}'], capture_output=True).returncode == 0
+		if fetched.returncode != 0 or not has_branch:
+			raise ValueError(f'Cannot move {export} into the shared repository, branch {export_branch} could not be fetched: {fetched.stderr.decode("utf-8").strip()}')
+		shutil.rmtree(export)
+	subprocess.run([*repo, 'worktree', 'prune'])
+	if reset:
+		subprocess.run([*repo, 'branch', '-q', '-D', export_branch], capture_output=True)
+		delete_tags(repo, export)
+	if os.path.exists(f'{export}/.git'):
+		return
+	shutil.rmtree(export, ignore_errors=True)
+	has_branch = subprocess.run([*repo, 'rev-parse', '-q', '--verify', f'refs/heads/{export_branch}'], capture_output=True).returncode == 0
+	if has_branch:
+		subprocess.run([*repo, 'worktree', 'add', '-q', os.path.abspath(export), export_branch])
+	else:
+		empty = subprocess.run([*repo, 'commit-tree', EMPTY_TREE, '-m', 'Empty'], capture_output=True).stdout.decode('utf-8').strip()
+		subprocess.run([*repo, 'worktree', 'add', '-q', '--detach', os.path.abspath(export), empty])
+		subprocess.run(['git', '-C', export, 'checkout', '-q', '--orphan', export_branch])
+
+
+def delete_tags(repo: list[str], export: str):
+	taglist = subprocess.run([*repo, 'tag', '-l', f'*-{export}'], capture_output=True).stdout.decode('utf-8').split('\n')
+	batch_size = 100
+	for i in range(0, len(taglist), batch_size):
+			batch = taglist[i:i + batch_size]
+			subprocess.run([*repo, 'tag', '-d', *batch], capture_output=True)
+	return len(taglist) - 1
+
+
+def get_fingerprint(version: str, versions: dict[str], exports: tuple[str]):
+	# everything the exports of a version are built from, including this code
+	launchermeta = json.loads(retry(fetch_meta, 'versionmeta', versions[version]).decode('utf-8'))
+	code = hashlib.sha1()
+	for file in ['main.py', 'indexed_summary.py']:
+		with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), file), 'rb') as f:
+			code.update(f.read())
+	inputs = {
+		'version': version,
+		'client': launchermeta['downloads']['client']['sha1'],
+		'server': launchermeta['downloads']['server']['sha1'],
+		'assets': launchermeta['assetIndex']['sha1'],
+		'exports': sorted(exports),
+		'code': code.hexdigest(),
+	}
+	return hashlib.sha1(json.dumps(inputs, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def read_fingerprint(export: str):
+	# fingerprints are kept in a git note on the branch tip, so recording one never adds a commit
+	result = subprocess.run(['git', 'notes', f'--ref=fingerprint-{export}', 'show', 'HEAD'], cwd=export, capture_output=True)
+	return result.stdout.decode('utf-8').strip() if result.returncode == 0 else None
+
+
+def create_commit(version: str | None, date: str | None, push: bool, force: bool, exports: tuple[str], branch: str | None, fingerprint: str | None = None):
 	for export in exports:
 		export_branch = f'{branch}-{export}' if branch else export
 		os.chdir(export)
@@ -766,11 +1171,14 @@ def create_commit(version: str | None, date: str | None, push: bool, force: bool
 			os.environ['GIT_COMMITTER_DATE'] = date
 			subprocess.run(['git', 'commit', '-q', '-m', f'🚀 Update {export} for {version}'])
 			subprocess.run(['git', 'tag', '-f', f'{version}-{export}'])
+			if fingerprint:
+				subprocess.run(['git', 'notes', f'--ref=fingerprint-{export}', 'add', '-f', '-m', fingerprint, 'HEAD'], capture_output=True)
 		if push:
+			notes = get_fingerprint_refspecs(export, cwd='.')
 			if force:
-				subprocess.run(['git', 'push', '-f', '-q', '--tags', 'origin', export_branch])
+				subprocess.run(['git', 'push', '-f', '-q', '--tags', 'origin', export_branch, *notes])
 			else:
-				subprocess.run(['git', 'push', '-q', '--tags', 'origin', export_branch])
+				subprocess.run(['git', 'push', '-q', '--tags', 'origin', export_branch, *notes])
 		os.chdir('..')
 		if version:
 			click.echo(f'🚀 Created commit on {export_branch} branch')
@@ -778,16 +1186,48 @@ def create_commit(version: str | None, date: str | None, push: bool, force: bool
 			click.echo(f'🚀 Pushed to {export_branch} branch')
 
 
+def get_fingerprint_refspecs(export: str, cwd: str | None = None):
+	notes = f'refs/notes/fingerprint-{export}'
+	if subprocess.run(['git', 'rev-parse', '-q', '--verify', notes], cwd=cwd or export, capture_output=True).returncode != 0:
+		return []
+	return [f'+{notes}:{notes}']
+
+
+def push_exports(exports: tuple[str], branch: str | None, force: bool, versions: list[str] | None = None):
+	if not exports:
+		return
+	with multiprocessing.Pool(len(exports)) as pool:
+		results = pool.map(push_export, [(export, branch, force, versions) for export in exports])
+	for export, success in zip(exports, results):
+		export_branch = f'{branch}-{export}' if branch else export
+		if success:
+			click.echo(f'🚀 Pushed to {export_branch} branch')
+		else:
+			click.echo(f'💥 Failed to push to {export_branch} branch')
+
+
+def push_export(args: tuple):
+	# push the branch and its version tags in a single atomic update
+	export, branch, force, versions = args
+	export_branch = f'{branch}-{export}' if branch else export
+	if versions is None:
+		tags = [f'refs/tags/*-{export}:refs/tags/*-{export}']
+	else:
+		# the tags of this batch may have been moved by a re-run, so they are updated forcefully
+		tags = [*[f'+refs/tags/{v}-{export}:refs/tags/{v}-{export}' for v in versions], *get_fingerprint_refspecs(export)]
+	if force:
+		result = subprocess.run(['git', 'push', '-f', '-q', '--atomic', 'origin', export_branch, *tags], cwd=export)
+	else:
+		result = subprocess.run(['git', 'push', '-q', '--atomic', 'origin', export_branch, *tags], cwd=export)
+	return result.returncode == 0
+
+
 def fix_tags(exports: tuple[str], branch: str | None):
 	for export in exports:
 		export_branch = f'{branch}-{export}' if branch else export
 		os.chdir(export)
-		taglist = subprocess.run(['git', 'tag', '-l'], capture_output=True).stdout.decode('utf-8').split('\n')
-		batch_size = 100
-		for i in range(0, len(taglist), batch_size):
-				batch = taglist[i:i + batch_size]
-				subprocess.run(['git', 'tag', '-d', *batch], capture_output=True)
-		click.echo(f'🔥 Deleted {len(taglist) - 1} tags in {export_branch} branch')
+		deleted = delete_tags(['git'], export)
+		click.echo(f'🔥 Deleted {deleted} tags in {export_branch} branch')
 		commits = [c
 			for c in subprocess.run(['git', 'log', '--format=%h %f'], capture_output=True).stdout.decode('utf-8').split('\n')
 			if re.match('^.* .*$', c) and not c.endswith('Initial-commit')
@@ -817,6 +1257,70 @@ def download_resource(resource: tuple):
 		f.write(sound)
 
 
+def load_resources_index():
+	try:
+		with open('resources/.index.json', 'r') as f:
+			return json.load(f)
+	except (OSError, ValueError):
+		return None
+
+
+def save_resources_index(index: dict):
+	os.makedirs('resources', exist_ok=True)
+	with open('resources/.index.json', 'w') as f:
+		json.dump(index, f)
+
+
+def get_resources_exports(exports: tuple[str]):
+	resources_exports = []
+	if 'assets' in exports or 'diff' in exports or 'summary' in exports:
+		resources_exports.append('assets')
+	if 'assets-json' in exports:
+		resources_exports.append('assets-json')
+	return resources_exports
+
+
+def is_resources_synced(export: str, index: dict | None):
+	# the export tree can be reused when it was last built from this asset index
+	if index is None:
+		return False
+	return index['exports'].get(export) == index['version']
+
+
+def invalidate_resources_export(export: str):
+	# the export tree was changed outside of process, so it needs a full rebuild
+	index = load_resources_index()
+	if index and export in index['exports']:
+		del index['exports'][export]
+		save_resources_index(index)
+
+
+def is_exported_resource(key: str, pattern: str):
+	if key.endswith('hash.txt') or key.endswith('pack.mcmeta'):
+		return False
+	if any(part.startswith('.') for part in key.split('/')):
+		return False
+	return fnmatch.fnmatch(os.path.basename(key), pattern)
+
+
+def remove_jar_files(path: str, objects: dict[str, str]):
+	for root, dirs, files in os.walk(path, topdown=False):
+		for file in files:
+			file_path = os.path.join(root, file)
+			key = file_path.replace('\\', '/', -1).removeprefix(f'{path}/')
+			if key not in objects:
+				os.remove(file_path)
+		if not os.listdir(root):
+			os.rmdir(root)
+
+
+def remove_file(path: str):
+	try:
+		os.remove(path)
+	except OSError:
+		pass
+
+
 def get_resource(hash: str):
 	url = f'https://resources.download.minecraft.net/{hash[0:2]}/{hash}'
 	return retry(fetch, f'resource-{hash}', url)
@@ -855,4 +1359,7 @@ def retry(fn, *args, **kwargs):
 
 
 if __name__ == '__main__':
-	main()
+	if sys.argv[1:2] == ['serve']:
+		serve(sys.argv[2:])
+	else:
+		main()